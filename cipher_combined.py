@@ -10,9 +10,14 @@ Includes:
   - attack_known_plaintext(known_plaintext, known_ciphertext, max_cols=8)
 """
 
-import math
+import os
+import heapq
+import contextlib
+import operator
+import functools
 import itertools
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 ENGLISH_FREQ = {
     'A': 8.167,'B':1.492,'C':2.782,'D':4.253,'E':12.702,'F':2.228,'G':2.015,
@@ -21,46 +26,120 @@ ENGLISH_FREQ = {
     'V':0.978,'W':2.360,'X':0.150,'Y':1.974,'Z':0.074
 }
 
+ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+# English letter probabilities in A-Z order (index = letter code)
+EXPECTED = [ENGLISH_FREQ[chr(c)] / 100.0 for c in ALPHABET]
+INV_EXPECTED = [1.0 / p for p in EXPECTED]
+SUM_EXPECTED = sum(EXPECTED)
+
+# every byte except A-Z, for bytes.translate to delete in normalize_text
+_NON_LETTERS = bytes(b for b in range(256) if not 65 <= b <= 90)
+
 def normalize_text(s):
     """Keep only A-Z uppercase letters."""
-    return ''.join(ch for ch in s.upper() if 'A' <= ch <= 'Z')
+    # upper() first so e.g. 'ß' -> 'SS' still counts; then one C-level delete pass
+    return s.upper().encode('ascii', 'ignore').translate(None, _NON_LETTERS).decode('ascii')
 
 # -----------------------
 # Vigenere functions
 # -----------------------
+# _SHIFT_TABLES[s] is a bytes.translate table moving each letter s places forward;
+# like the per-character formula chr((ord(ch) - 65 + s) % 26 + 65), every other
+# byte is reduced mod 26 onto A-Z as well
+_SHIFT_TABLES = [bytes(65 + (b - 65 + s) % 26 for b in range(256)) for s in range(26)]
+
+# translate tables between ASCII letters and codes 0..25
+_TO_CODES = bytes.maketrans(ALPHABET, bytes(range(26)))
+_TO_CODES_PLUS_26 = bytes.maketrans(ALPHABET, bytes(range(26, 52)))
+_FROM_CODES = bytes.maketrans(bytes(range(26)), ALPHABET)
+_MOD_26 = bytes(b % 26 if b < 52 else b for b in range(256))
+
+def _key_shifts(key):
+    """Convert a Vigenere key string to its list of shifts (A=0 ... Z=25)."""
+    return [(ord(k) - 65) % 26 for k in key.upper()]
+
+def _letter_bytes(s):
+    """
+    Encode str `s` for _vigenere_translate. ASCII text is encoded as is; other
+    characters are first folded to the letter chr((ord(ch) - 65) % 26 + 65),
+    which the shift tables treat exactly as the character itself.
+    """
+    if s.isascii():
+        return s.encode('ascii')
+    return bytes(65 + (ord(ch) - 65) % 26 for ch in s)
+
+def _vigenere_translate(text, tables):
+    """
+    Translate letter i of `text` (ASCII bytes, A-Z) with tables[i % len(tables)].
+    Every key position is handled as one strided slice + translate, so the work
+    is len(tables) C-level calls instead of one Python step per character;
+    positions past the end of a short text are skipped.
+    """
+    L = len(tables)
+    out = bytearray(text)
+    for pos, table in zip(range(len(text)), tables):
+        out[pos::L] = text[pos::L].translate(table)
+    return bytes(out)
+
+def _vigenere_shift(text, shifts):
+    """Shift letter i of `text` (ASCII bytes, A-Z) forward by shifts[i % len(shifts)]."""
+    return _vigenere_translate(text, [_SHIFT_TABLES[s % 26] for s in shifts])
+
+@functools.lru_cache(maxsize=128)
+def _vigenere_tables(key, inverse=False):
+    """
+    Per-position translate tables specialised for `key` (undoing the shifts if
+    `inverse`). Cached, so encrypting or decrypting many texts with one key
+    parses the key and picks its tables only once. Raises ValueError on an
+    empty key, which would otherwise leave the text unchanged.
+    """
+    if not key:
+        raise ValueError("Vigenere key must not be empty.")
+    shifts = _key_shifts(key)
+    if inverse:
+        shifts = [-s % 26 for s in shifts]
+    return tuple(_SHIFT_TABLES[s] for s in shifts)
+
 def vigenere_encrypt(pt, key):
-    key_nums = [ord(k)-65 for k in key.upper()]
-    L = len(key_nums)
-    ct_chars = []
-    for i, ch in enumerate(pt):
-        p = ord(ch) - 65
-        k = key_nums[i % L]
-        c = (p + k) % 26
-        ct_chars.append(chr(c + 65))
-    return ''.join(ct_chars)
+    """
+    Vigenere-encrypt `pt` with `key`; returns A-Z. Every character of `pt` is
+    shifted as ord(ch) - 65 mod 26, so non-letters are not passed through
+    (normalize_text first for A-Z only). Raises ValueError on an empty key.
+    """
+    return _vigenere_translate(_letter_bytes(pt), _vigenere_tables(key)).decode('ascii')
 
 def vigenere_decrypt(ct, key):
-    key_nums = [ord(k)-65 for k in key.upper()]
-    L = len(key_nums)
-    pt_chars = []
-    for i, ch in enumerate(ct):
-        c = ord(ch) - 65
-        k = key_nums[i % L]
-        p = (c - k + 26) % 26
-        pt_chars.append(chr(p + 65))
-    return ''.join(pt_chars)
+    """Inverse of vigenere_encrypt, with the same contract."""
+    return _vigenere_translate(_letter_bytes(ct), _vigenere_tables(key, inverse=True)).decode('ascii')
 
 # -----------------------
 # Columnar functions
 # -----------------------
+@functools.lru_cache(maxsize=128)
 def column_order_from_key(key):
     """
-    Return list of original column indices in the order columns are read.
-    Example: key = "ZEBRA" -> sorted list [('A',4),('B',2),...] -> return [4,2,...]
+    Return tuple of original column indices in the order columns are read.
+    Example: key = "ZEBRA" -> sorted list [('A',4),('B',2),...] -> return (4,2,...)
+    Cached, since the same key is re-sorted on every encrypt/decrypt call.
     """
     enumerated = list(enumerate(key))
     sorted_pairs = sorted(enumerated, key=lambda x: (x[1], x[0]))
-    return [idx for idx, ch in sorted_pairs]
+    return tuple(idx for idx, ch in sorted_pairs)
+
+def undo_columns(segs, perm, rows):
+    """
+    Inverse columnar step: write segs[sorted_pos] (ASCII bytes, at most `rows`
+    long) down original column perm[sorted_pos] of a flat row-wise buffer, cell
+    (r, c) at r*L + c. Cells a short segment leaves empty stay zero bytes and are
+    dropped, then the 'X' padding is stripped. Returns ASCII bytes.
+    """
+    L = len(perm)
+    buf = bytearray(rows * L)
+    for sorted_pos, orig_col in enumerate(perm):
+        seg = segs[sorted_pos]
+        buf[orig_col:orig_col + len(seg)*L:L] = seg
+    return bytes(buf).replace(b'\0', b'').rstrip(b'X')
 
 def encrypt(plaintext, kv, kc):
     """
@@ -79,17 +158,12 @@ def encrypt(plaintext, kv, kc):
     intermediate = vigenere_encrypt(pt, kv)
     # Stage B: columnar transposition
     Lc = len(kc)
-    rows = math.ceil(len(intermediate) / Lc)
+    rows = (len(intermediate) + Lc - 1) // Lc
     pad_len = rows * Lc - len(intermediate)
     intermediate_padded = intermediate + 'X' * pad_len
-    # build matrix row-wise
-    matrix = [list(intermediate_padded[i*Lc:(i+1)*Lc]) for i in range(rows)]
+    # the text is the matrix written row-wise, so column c is every Lc-th char from c
     order = column_order_from_key(kc)
-    ciphertext = []
-    for col_index in order:
-        for r in range(rows):
-            ciphertext.append(matrix[r][col_index])
-    return ''.join(ciphertext)
+    return ''.join(intermediate_padded[col_index::Lc] for col_index in order)
 
 def decrypt(ciphertext, kv, kc):
     """
@@ -103,163 +177,414 @@ def decrypt(ciphertext, kv, kc):
         raise ValueError("Vigenere key must be at least 10 characters.")
     ct = normalize_text(ciphertext)
     Lc = len(kc)
-    rows = math.ceil(len(ct) / Lc)
+    rows = (len(ct) + Lc - 1) // Lc
     order = column_order_from_key(kc)  # sorted order -> original indices
-    # split ciphertext into Lc columns each of length rows
-    cols = []
-    pos = 0
-    for _ in range(Lc):
-        cols.append(list(ct[pos:pos+rows]))
-        pos += rows
-    # place these columns back into original column positions
-    matrix = [[''] * Lc for _ in range(rows)]
-    for sorted_idx, orig_col in enumerate(order):
-        col = cols[sorted_idx]
-        for r in range(rows):
-            matrix[r][orig_col] = col[r] if r < len(col) else ''
-    intermediate = ''.join(''.join(row) for row in matrix).rstrip('X')
+    # split ciphertext into Lc columns each of length rows and put them back
+    ct_bytes = ct.encode('ascii')
+    cols = [ct_bytes[i*rows:(i+1)*rows] for i in range(Lc)]
+    intermediate = undo_columns(cols, order, rows).decode('ascii')
     plaintext = vigenere_decrypt(intermediate, kv)
     return plaintext
 
 # -----------------------
 # Analysis helpers
 # -----------------------
+def letter_counts(text):
+    """Return the 26 A-Z letter counts of `text` (ASCII bytes)."""
+    return [text.count(letter) for letter in ALPHABET]
+
+def _chi_squared_counts(counts, N):
+    """Chi-squared of A-Z `counts` for a text of length N."""
+    score = 0.0
+    for observed, prob in zip(counts, EXPECTED):
+        expected = prob * N
+        score += ((observed - expected)**2) / expected
+    return score
+
 def chi_squared_score(text):
-    """Chi-squared statistic against English letter frequencies (lower is better)."""
+    """
+    Chi-squared statistic against English letter frequencies (lower is better).
+    `text` may be a str or ASCII bytes (A-Z); bytes avoid a re-encode in hot loops.
+    Characters other than A-Z count towards the length but match no letter.
+    """
+    if isinstance(text, str):
+        # non-ASCII characters become '?' so they still count as one character each
+        text = text.encode('ascii', 'replace')
     N = len(text)
     if N == 0:
         return float('inf')
-    counts = Counter(text)
-    score = 0.0
-    for ch in ENGLISH_FREQ:
-        observed = counts.get(ch, 0)
-        expected = ENGLISH_FREQ[ch] * N / 100.0
-        if expected > 0:
-            score += ((observed - expected)**2) / expected
-    return score
+    return _chi_squared_counts(letter_counts(text), N)
 
-def attempt_undo_transposition(ct, cols):
+def best_caesar_shift(text):
     """
-    Split ct into `cols` segments assuming equal column heights (padding used).
-    For small cols, try all permutations and reconstruct row-wise text.
-    Returns list of (perm, reconstructed_text).
+    Return (shift, score): the shift whose Caesar decryption of `text` (ASCII
+    bytes) has the lowest chi-squared score. Decrypting by `shift` maps letter
+    c to c - shift, so its counts are the original counts rotated left by
+    `shift`; all 26 candidates are scored from a single counting pass.
+
+    With e_p = EXPECTED[p] * N, sum((o - e)**2 / e) expands to
+    sum(o**2 / EXPECTED[p]) / N - 2 * sum(o) + N * sum(EXPECTED), and only the
+    first term depends on the shift, so each shift costs one 26-term dot product.
+    """
+    N = len(text)
+    if N == 0:
+        return 0, float('inf')
+    counts = letter_counts(text)
+    squares = [c * c for c in counts]
+    squares += squares  # rotation by `shift` is the window squares[shift:shift+26]
+    best_shift = 0
+    best_weighted = float('inf')
+    for shift in range(26):
+        weighted = sum(map(operator.mul, squares[shift:shift+26], INV_EXPECTED))
+        if weighted < best_weighted:
+            best_weighted = weighted
+            best_shift = shift
+    best_score = best_weighted / N - 2 * sum(counts) + N * SUM_EXPECTED
+    return best_shift, best_score
+
+def score_all_positions(text, key_len):
+    """Return best_caesar_shift() of every key position text[pos::key_len]."""
+    return [best_caesar_shift(text[pos::key_len]) for pos in range(key_len)]
+
+def minimal_period(seq):
+    """
+    Smallest p with seq[i] == seq[i % p] for every i (len(seq) if nothing
+    repeats). That is len(seq) minus the longest proper border of seq, read
+    off the KMP failure function in O(n).
+    """
+    n = len(seq)
+    if not n:
+        return 0
+    failure = [0] * n
+    k = 0
+    for i in range(1, n):
+        while k and seq[i] != seq[k]:
+            k = failure[k-1]
+        if seq[i] == seq[k]:
+            k += 1
+        failure[i] = k
+    return n - failure[-1]
+
+def periodic_ioc(text, period):
+    """
+    Index of coincidence pooled over the slices text[pos::period]: equal-letter
+    pairs inside a slice divided by all pairs inside a slice.
+    """
+    coincidences = 0
+    pairs = 0
+    for pos in range(period):
+        sub = text[pos::period]
+        N = len(sub)
+        coincidences += sum(c * (c - 1) for c in letter_counts(sub))
+        pairs += N * (N - 1)
+    return coincidences / pairs if pairs else 0.0
+
+def _ioc_pair_tables(segs, rows, max_period):
+    """
+    Pair-count tables for _score_column_orders, one entry per period in
+    `periods`: (periods, within, across, pairs), where across[s][t][d + L - 1]
+    holds segments s < t placed d columns apart.
+    """
+    # cell (r, c) sits at r*L + c, so two cells share a key position under
+    # period p iff p divides (r1 - r2)*L + (c1 - c2): for two segments that
+    # only depends on their rows and on how far apart their columns are
+    L = len(segs)
+    size = rows * L
+    periods = []
+    pairs = []
+    for p in range(1, max_period + 1):
+        q, r = divmod(size, p)
+        total = r * (q + 1) * q + (p - r) * q * (q - 1)
+        if total:
+            periods.append(p)
+            pairs.append(total)
+    # letter -> rows holding it, per segment
+    rows_of = []
+    for seg in segs:
+        where = {}
+        for r, letter in enumerate(seg):
+            where.setdefault(letter, []).append(r)
+        rows_of.append(where)
+
+    def by_residue(a, b):
+        # equal-letter pairs (r1 in a, r2 in b) folded by (r1 - r2)*L mod p
+        diffs = Counter(r1 - r2 for letter, ra in a.items()
+                        for r1 in ra for r2 in b.get(letter, ()))
+        folded = []
+        for p in periods:
+            res = [0] * p
+            for d, n in diffs.items():
+                res[d * L % p] += n
+            folded.append(res)
+        return folded
+
+    within = [0] * len(periods)
+    for seg, where in zip(segs, rows_of):
+        folded = by_residue(where, where)
+        # drop each cell paired with itself (row difference 0)
+        within = [w + res[0] - len(seg) for w, res in zip(within, folded)]
+    across = [[None] * L for _ in range(L)]
+    for s_idx in range(L):
+        for t_idx in range(s_idx + 1, L):
+            folded = by_residue(rows_of[s_idx], rows_of[t_idx])
+            # every unordered pair counts twice, as (i, j) and (j, i)
+            across[s_idx][t_idx] = [[2 * res[-d % p] for p, res in zip(periods, folded)]
+                                    for d in range(-(L - 1), L)]
+    return periods, within, across, pairs
+
+def _score_column_orders(segs, rows, max_period):
+    """
+    Yield (score, perm) for every column order of `segs`, higher is better:
+    the best periodic_ioc over periods 1..max_period of the rows*L grid,
+    computed from _ioc_pair_tables without building any candidate text.
+    """
+    # the candidate is still Vigenere ciphertext, so n-gram scores do not apply;
+    # the right order sliced by the key length is Caesar-shifted English (high IoC)
+    L = len(segs)
+    periods, within, across, pairs = _ioc_pair_tables(segs, rows, max_period)
+    for perm in itertools.permutations(range(L)):
+        totals = within
+        for s_idx in range(L - 1):
+            row = across[s_idx]
+            offset = perm[s_idx] + L - 1
+            for t_idx in range(s_idx + 1, L):
+                totals = list(map(operator.add, totals, row[t_idx][offset - perm[t_idx]]))
+        yield max(map(operator.truediv, totals, pairs), default=0.0), perm
+
+def attempt_undo_transposition_bytes(ct, cols, keep=None, kv_maxlen=20):
+    """
+    attempt_undo_transposition on ASCII bytes: `ct` is the normalized
+    ciphertext as bytes and the candidates come back as bytes too, so the
+    attack can pass them along without encoding or decoding again.
     """
     L = cols
-    rows = math.ceil(len(ct) / L)
+    rows = (len(ct) + L - 1) // L
     # create segments in read-order
     segs = [ct[i*rows:(i+1)*rows] for i in range(L)]
     results = []
     if L > 8:
         return results  # avoid huge permutation space
-    for perm in itertools.permutations(range(L)):
-        # perm: mapping from sorted-order position -> original column index
-        matrix = [[''] * L for _ in range(rows)]
-        for sorted_pos, orig_col in enumerate(perm):
-            seg = segs[sorted_pos]
-            for r in range(len(seg)):
-                matrix[r][orig_col] = seg[r]
-        reconstructed = ''.join(''.join(row) for row in matrix).rstrip('X')
-        results.append((perm, reconstructed))
+    # perm: mapping from sorted-order position -> original column index
+    if keep is None:
+        for perm in itertools.permutations(range(L)):
+            results.append((perm, undo_columns(segs, perm, rows)))
+        return results
+    heap = []  # min-heap of (score, perm): the weakest kept order is on top
+    for entry in _score_column_orders(segs, rows, kv_maxlen):
+        if len(heap) < keep:
+            heapq.heappush(heap, entry)
+        else:
+            heapq.heappushpop(heap, entry)
+    for _, perm in sorted(heap, reverse=True):
+        results.append((perm, undo_columns(segs, perm, rows)))
     return results
 
+def attempt_undo_transposition(ct, cols, keep=None, kv_maxlen=20):
+    """
+    Split ct into `cols` segments assuming equal column heights (padding used).
+    For small cols, try all permutations and reconstruct row-wise text.
+    Returns list of (perm, reconstructed_text).
+    If `keep` is given, only the `keep` candidates with the best
+    _score_column_orders score (periods up to kv_maxlen) are returned, best first;
+    all orders are scored in one batch from precomputed tables and only the
+    kept ones are reconstructed.
+    """
+    undone = attempt_undo_transposition_bytes(ct.encode('ascii'), cols, keep, kv_maxlen)
+    return [(perm, text.decode('ascii')) for perm, text in undone]
+
 # -----------------------
 # Attack functions
 # -----------------------
-def attack_frequency(ciphertext, max_cols=8, kv_maxlen=20):
+# normalized IoC (x26) of English is ~1.73 and of random text 1.0; key lengths
+# reaching 1.6 are searched, or the best three if fewer do
+IOC_KEY_LEN_CUTOFF = 1.6 / 26
+MIN_KEY_LENS_TRIED = 3
+
+def likely_key_lengths(text, max_len):
+    """
+    Key lengths 1..max_len worth a chi-squared search on `text` (ASCII bytes),
+    in increasing order: slicing by the right length (or a multiple of it)
+    gives Caesar-shifted English, whose periodic IoC is close to English's.
+    """
+    iocs = {kl: periodic_ioc(text, kl) for kl in range(1, max_len + 1)}
+    likely = [kl for kl, ioc in iocs.items() if ioc >= IOC_KEY_LEN_CUTOFF]
+    if len(likely) < MIN_KEY_LENS_TRIED:
+        likely = sorted(iocs, key=iocs.get, reverse=True)[:MIN_KEY_LENS_TRIED]
+    return sorted(likely)
+
+def _score_candidate(args):
+    """
+    Vigenere key search for one (cols, perm, candidate) produced by
+    attempt_undo_transposition_bytes. Module-level so ProcessPoolExecutor can
+    pickle it. Returns one result dict per key length tried (see
+    likely_key_lengths); 'plaintext_candidate' is left as bytes for
+    attack_frequency to decode once it has picked the winners.
+    """
+    cols, perm, candidate, kv_maxlen = args
+    scored = []
+    # try key lengths
+    for kl in likely_key_lengths(candidate, min(kv_maxlen, len(candidate))):
+        # determine best shift for each key position
+        key_shifts = [shift for shift, _ in score_all_positions(candidate, kl)]
+        key = ''.join(chr(s + 65) for s in key_shifts)
+        # decrypt straight from the shifts rather than re-parsing `key`
+        dec_bytes = _vigenere_shift(candidate, [-s % 26 for s in key_shifts])
+        final_score = chi_squared_score(dec_bytes)
+        scored.append({
+            'cols': cols,
+            'perm': perm,
+            'key_len': kl,
+            'key': key,
+            'plaintext_candidate': dec_bytes,
+            'score': final_score
+        })
+    return scored
+
+# below this many candidates attack_frequency scores them without a process pool
+PARALLEL_MIN_TASKS = 64
+
+def attack_frequency(ciphertext, max_cols=8, kv_maxlen=20, keep_perms=64, max_workers=None):
     """
     Blind frequency-based attack.
     - Try column counts 2..max_cols (but only permute if <=8)
-    - For each reconstructed candidate, try vigenere key lengths up to kv_maxlen
+    - Keep only the keep_perms most plausible column orders per column count
+      (see _score_column_orders) before the expensive key search
+    - For each reconstructed candidate, try the vigenere key lengths up to
+      kv_maxlen with the highest index of coincidence (likely_key_lengths)
       and pick best shifts per key-position by chi-squared on each subsequence.
+    - max_workers: processes for the key search (default: one per CPU; 1 = none)
     Returns top candidate dicts sorted by chi score.
     """
-    best_candidates = []
-    ct = normalize_text(ciphertext)
+    # bounded max-heap of the 10 best: entries (-score, -seq, cand) put the worst
+    # score on top, and on equal scores the later candidate, as a stable sort would
+    heap = []
+    seq = 0
+    # encode once; candidates stay bytes until the final results are built
+    ct = normalize_text(ciphertext).encode('ascii')
     n = len(ct)
+    tasks = []
     for cols in range(2, min(max_cols+1, n)):
-        undo_results = attempt_undo_transposition(ct, cols)
+        undo_results = attempt_undo_transposition_bytes(ct, cols, keep=keep_perms, kv_maxlen=kv_maxlen)
         for perm, candidate in undo_results:
-            # try key lengths
-            for kl in range(1, min(kv_maxlen, len(candidate)) + 1):
-                key_shifts = []
-                # determine best shift for each key position
-                for pos in range(kl):
-                    subseq = candidate[pos::kl]
-                    best_shift = 0
-                    best_score = float('inf')
-                    for shift in range(26):
-                        dec = ''.join(chr(((ord(ch)-65 - shift) % 26) + 65) for ch in subseq)
-                        score = chi_squared_score(dec)
-                        if score < best_score:
-                            best_score = score
-                            best_shift = shift
-                    key_shifts.append(best_shift)
-                key = ''.join(chr(s + 65) for s in key_shifts)
-                dec_full = vigenere_decrypt(candidate, key)
-                final_score = chi_squared_score(dec_full)
-                best_candidates.append({
-                    'cols': cols,
-                    'perm': perm,
-                    'key_len': kl,
-                    'key': key,
-                    'plaintext_candidate': dec_full,
-                    'score': final_score
-                })
-    best_candidates.sort(key=lambda x: x['score'])
-    return best_candidates[:10]
+            tasks.append((cols, perm, candidate, kv_maxlen))
+    workers = max_workers or os.cpu_count() or 1
+    # for a single worker or few tasks it is not worth starting worker processes
+    parallel = workers > 1 and len(tasks) >= PARALLEL_MIN_TASKS
+    pool = ProcessPoolExecutor(max_workers=workers) if parallel else contextlib.nullcontext()
+    with pool as ex:
+        if ex is None:
+            results = map(_score_candidate, tasks)
+        else:
+            # batches of up to 64 tasks, but small enough that every worker gets several
+            chunksize = max(1, min(64, len(tasks) // (4 * workers)))
+            results = ex.map(_score_candidate, tasks, chunksize=chunksize)
+        for scored in results:
+            for cand in scored:
+                entry = (-cand['score'], -seq, cand)
+                seq += 1
+                if len(heap) < 10:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heappushpop(heap, entry)
+    best_candidates = [cand for _, _, cand in sorted(heap, reverse=True)]
+    for cand in best_candidates:
+        cand['plaintext_candidate'] = cand['plaintext_candidate'].decode('ascii')
+    return best_candidates
 
-def attack_known_plaintext(known_pt, known_ct, max_cols=8):
+def _consistent_column_orders(segs, kp, max_key_len):
+    """
+    Yield the column permutations (as itertools.permutations would, in the same
+    order) whose known-plaintext (kp, ASCII bytes, like segs) shifts can still
+    repeat with some key length <= max_key_len. Columns are assigned one
+    segment at a time and a branch is cut as soon as the shifts fixed so far
+    rule out every such key length.
+    Only rows every segment reaches are checked: there the intermediate index
+    of row r, column c is r*cols + c whatever the other columns hold.
+    """
+    cols = len(segs)
+    m = len(kp)
+    full_rows = min(len(seg) for seg in segs)
+    shifts = [None] * m
+    used = [False] * cols
+
+    def assign_column(pos, partial, periods):
+        if pos == cols:
+            yield tuple(partial)
+            return
+        seg = segs[pos]
+        for c in range(cols):
+            if used[c]:
+                continue
+            new = [i for i in range(c, min(full_rows * cols, m), cols)]
+            for i in new:
+                shifts[i] = (seg[i // cols] - kp[i]) % 26
+            # keep the key lengths under which every new shift agrees with the
+            # known shifts in the same key position
+            viable = [p for p in periods
+                      if all(shifts[j] is None or shifts[j] == shifts[i]
+                             for i in new for j in range(i % p, m, p))]
+            if viable:
+                used[c] = True
+                partial.append(c)
+                yield from assign_column(pos + 1, partial, viable)
+                partial.pop()
+                used[c] = False
+            for i in new:
+                shifts[i] = None
+
+    yield from assign_column(0, [], list(range(1, max_key_len + 1)))
+
+def attack_known_plaintext(known_pt, known_ct, max_cols=8, max_key_len=None):
     """
     Known plaintext attack.
     - known_pt: a plaintext fragment (will be normalized)
     - known_ct: corresponding ciphertext fragment (same alignment)
+    - max_key_len: longest Vigenere key accepted (default: no limit, i.e. the
+      length of the known plaintext). Setting it, e.g. to half the known
+      plaintext so the key must repeat at least once, prunes column orders
+      that cannot give such a key while they are being built (see
+      _consistent_column_orders); keys longer than the bound are not reported.
     Returns possible candidates with recovered column permutation and Vigenere key.
     """
     kp = normalize_text(known_pt)
     kc = normalize_text(known_ct)
     results = []
+    if not kp:
+        return results  # nothing known, so no shifts to derive a key from
+    if max_key_len is None:
+        max_key_len = len(kp)
+    kp_bytes = kp.encode('ascii')
+    kp_codes = kp_bytes.translate(_TO_CODES)
+    kc_bytes = kc.encode('ascii')
     n = len(kc)
     for cols in range(2, min(max_cols+1, n)):
-        rows = math.ceil(len(kc) / cols)
-        segs = [kc[i*rows:(i+1)*rows] for i in range(cols)]
+        rows = (len(kc) + cols - 1) // cols
+        segs = [kc_bytes[i*rows:(i+1)*rows] for i in range(cols)]
         if cols > 8:
             continue
-        for perm in itertools.permutations(range(cols)):
-            matrix = [[''] * cols for _ in range(rows)]
-            for sorted_pos, orig_col in enumerate(perm):
-                seg = segs[sorted_pos]
-                for r in range(len(seg)):
-                    matrix[r][orig_col] = seg[r]
-            intermediate = ''.join(''.join(row) for row in matrix).rstrip('X')
+        for perm in _consistent_column_orders(segs, kp_bytes, max_key_len):
+            intermediate = undo_columns(segs, perm, rows)
             if len(intermediate) < len(kp):
                 continue
-            # derive shifts that map kp -> intermediate prefix
-            derived_shifts = []
-            for i, ch in enumerate(kp):
-                c = ord(intermediate[i]) - 65
-                p = ord(ch) - 65
-                shift = (c - p) % 26
-                derived_shifts.append(shift)
+            # derive shifts that map kp -> intermediate prefix: (c + 26) - p lies in
+            # 1..51, so one subtraction pass and a mod-26 table give all shifts
+            inter_codes = intermediate[:len(kp)].translate(_TO_CODES_PLUS_26)
+            derived_shifts = bytes(map(operator.sub, inter_codes, kp_codes)).translate(_MOD_26)
             # find minimal repeating period for shifts
-            for key_len in range(1, len(derived_shifts) + 1):
-                ok = True
-                for i in range(len(derived_shifts)):
-                    if derived_shifts[i] != derived_shifts[i % key_len]:
-                        ok = False
-                        break
-                if ok:
-                    key = ''.join(chr(s + 65) for s in derived_shifts[:key_len])
-                    dec_full = vigenere_decrypt(intermediate, key)
-                    if dec_full.startswith(kp):
-                        results.append({
-                            'cols': cols,
-                            'perm': perm,
-                            'key_len': key_len,
-                            'kv_key': key,
-                            'intermediate': intermediate,
-                            'plaintext_full_candidate': dec_full
-                        })
-                    break
+            key_len = minimal_period(derived_shifts)
+            if key_len > max_key_len:
+                continue
+            key = derived_shifts[:key_len].translate(_FROM_CODES).decode('ascii')
+            dec_full = _vigenere_shift(intermediate, [-d % 26 for d in derived_shifts[:key_len]]).decode('ascii')
+            if dec_full.startswith(kp):
+                results.append({
+                    'cols': cols,
+                    'perm': perm,
+                    'key_len': key_len,
+                    'kv_key': key,
+                    'intermediate': intermediate.decode('ascii'),
+                    'plaintext_full_candidate': dec_full
+                })
     return results
 
 # -----------------------